@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""memory.py
+
+Measures how much memory parsed abstract syntax trees hold, the cost that
+matters when many of them are kept in a sqlparser.ASTCache.  The trees for
+the throughput.py corpus are parsed and every object reachable from them is
+counted once
+    nodes       objects of the classes in sqlabstractsyntaxtree
+    node        bytes of the node objects themselves
+    containers  bytes of their children lists and attribute dictionaries
+    strings     bytes of the identifier, keyword and literal strings
+along with bytes per node, nodes plus containers over the node count.
+Results can be written as JSON and compared against an earlier run.
+
+Usage:
+    python benchmarks/memory.py [--scale=N] [--seed=N] [--json=path]
+                                [--baseline=path] [--tolerance=0.10]
+"""
+import os
+import sys
+import gc
+import json
+import getopt
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import sqlparser
+from throughput import GenerateCorpus
+
+MEASURES = ('nodes', 'node bytes', 'container bytes', 'string bytes', 'bytes/node')
+
+def isNode(obj):
+    return getattr(obj.__class__, '__module__', None) == 'sqlabstractsyntaxtree'
+
+def MeasureTrees(trees):
+    """Returns {measure : value} for everything reachable from trees, an
+    object reachable from several trees is counted once"""
+    seen = set()
+    totals = dict([(measure, 0) for measure in MEASURES])
+    stack = list(trees)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, (type, types.ClassType)):
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, basestring):
+            totals['string bytes'] += sys.getsizeof(obj)
+            continue
+        if isNode(obj):
+            totals['nodes'] += 1
+            totals['node bytes'] += sys.getsizeof(obj)
+        elif isinstance(obj, (list, tuple, dict)):
+            totals['container bytes'] += sys.getsizeof(obj)
+        else:
+            continue # numbers, None and the like are not the trees' own
+        stack.extend(gc.get_referents(obj))
+    totals['bytes/node'] = (totals['node bytes'] + totals['container bytes']) / float(max(totals['nodes'], 1))
+    return totals
+
+def Measure(corpus):
+    """Returns {family : {measure : value}} with an 'all' entry for every tree"""
+    results = {}
+    everything = []
+    for family, statements in sorted(corpus.items()):
+        trees = [sqlparser.GetASTFromSql(sql) for sql in statements]
+        everything.extend(trees)
+        results[family] = MeasureTrees(trees)
+    results['all'] = MeasureTrees(everything)
+    return results
+
+def Compare(results, baseline, tolerance):
+    """Returns the families whose bytes per node grew more than tolerance over baseline"""
+    larger = []
+    for family, result in sorted(results.items()):
+        before = baseline.get(family, {}).get('bytes/node')
+        if before and result['bytes/node'] > before * (1 + tolerance):
+            larger.append(family)
+    return larger
+
+def usage():
+    print __doc__
+
+def main(argv):
+    try:
+        opts, _ = getopt.getopt(argv, "h", ["help", "scale=", "seed=", "json=", "baseline=", "tolerance="])
+    except getopt.GetoptError:
+        usage()
+        sys.exit(2)
+    scale = 1
+    seed = 1
+    jsonFile = None
+    baselineFile = None
+    tolerance = 0.10
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            usage()
+            sys.exit(0)
+        elif opt == "--scale":
+            scale = int(arg)
+        elif opt == "--seed":
+            seed = int(arg)
+        elif opt == "--json":
+            jsonFile = arg
+        elif opt == "--baseline":
+            baselineFile = arg
+        elif opt == "--tolerance":
+            tolerance = float(arg)
+    results = Measure(GenerateCorpus(scale, seed))
+    print '%-12s' % 'family' + ''.join(['%17s' % measure for measure in MEASURES])
+    for family in sorted(results.keys(), key = lambda name: (name == 'all', name)):
+        result = results[family]
+        print '%-12s' % family + ''.join(['%17d' % result[measure] for measure in MEASURES[:-1]]) + '%17.1f' % result['bytes/node']
+    if jsonFile:
+        f = open(jsonFile, 'w')
+        json.dump({'scale' : scale, 'seed' : seed, 'results' : results}, f, indent = 1, sort_keys = True)
+        f.close()
+    if baselineFile:
+        f = open(baselineFile)
+        baseline = json.load(f)
+        f.close()
+        failed = False
+        for family in Compare(results, baseline['results'], tolerance):
+            print 'REGRESSION %s: %.1f bytes/node against %.1f' % (family, results[family]['bytes/node'], baseline['results'][family]['bytes/node'])
+            failed = True
+        if failed:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
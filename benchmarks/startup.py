@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""startup.py
+
+Measures how long sqltodal takes to start.  Every sample runs in a fresh
+interpreter and the median of the runs is reported for
+    import sqltokeniser            (lexer table load or build)
+    import sqlabstractsyntaxtree
+    import sqlparser               (on top of the two above, includes yacc.yacc())
+    parser tables loaded / built   (yacc.yacc() alone, from the imported sqlparsetab
+                                    and from the grammar as if sqlparsetab were stale)
+    cli                            (sqltodal.py --sql=... end to end)
+Results can be written as JSON and compared against an earlier run.
+
+Usage:
+    python benchmarks/startup.py [--runs=N] [--json=path]
+                                 [--baseline=path] [--tolerance=0.25] [--max-ms=N]
+"""
+import os
+import sys
+import json
+import getopt
+import subprocess
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SQL = "select user_master.login_user_id from user_master order by user_master.login_user_id desc for update"
+
+IMPORT_SCRIPT = """
+import sys, time
+sys.path.insert(0, %r)
+start = time.time()
+import sqltokeniser
+tokeniser = time.time()
+import sqlabstractsyntaxtree
+ast = time.time()
+import sqlparser
+parser = time.time()
+sqlparser.yacc.yacc(module = sqlparser, debug = 0, optimize = 1, tabmodule = sqlparser.sqlparsetab)
+loaded = time.time()
+sqlparser.yacc.yacc(module = sqlparser, debug = 0, write_tables = 0)
+built = time.time()
+print tokeniser - start, ast - tokeniser, parser - ast, loaded - parser, built - loaded
+""" % ROOT
+
+IMPORT_NAMES = ('import sqltokeniser', 'import sqlabstractsyntaxtree', 'import sqlparser',
+                'parser tables loaded', 'parser tables built')
+
+def median(samples):
+    samples = sorted(samples)
+    middle = len(samples) / 2
+    if len(samples) % 2:
+        return samples[middle]
+    return (samples[middle - 1] + samples[middle]) / 2.0
+
+def run(command):
+    """Runs command with stderr discarded and returns its stdout"""
+    devnull = open(os.devnull, 'w')
+    try:
+        return subprocess.Popen(command, stdout = subprocess.PIPE, stderr = devnull, cwd = ROOT).communicate()[0]
+    finally:
+        devnull.close()
+
+def MeasureImports(runs):
+    """Returns the median milliseconds for each of IMPORT_NAMES"""
+    samples = dict([(name, []) for name in IMPORT_NAMES])
+    for _ in range(runs):
+        times = run([sys.executable, '-c', IMPORT_SCRIPT]).split()
+        for name, seconds in zip(IMPORT_NAMES, times):
+            samples[name].append(float(seconds) * 1000)
+    return dict([(name, median(values)) for name, values in samples.items()])
+
+def MeasureCli(runs):
+    """Returns the median milliseconds for one sqltodal.py --sql run"""
+    samples = []
+    for _ in range(runs):
+        start = time.time()
+        run([sys.executable, os.path.join(ROOT, 'sqltodal.py'), '--sql=' + SQL])
+        samples.append((time.time() - start) * 1000)
+    return median(samples)
+
+def Compare(results, baseline, tolerance):
+    """Returns the names of the results more than tolerance slower than baseline"""
+    slower = []
+    for name, ms in sorted(results.items()):
+        if name in baseline and ms > baseline[name] * (1 + tolerance):
+            slower.append(name)
+    return slower
+
+def usage():
+    print __doc__
+
+def main(argv):
+    try:
+        opts, _ = getopt.getopt(argv, "h", ["help", "runs=", "json=", "baseline=", "tolerance=", "max-ms="])
+    except getopt.GetoptError:
+        usage()
+        sys.exit(2)
+    runs = 10
+    jsonFile = None
+    baselineFile = None
+    tolerance = 0.25
+    maxMs = None
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            usage()
+            sys.exit(0)
+        elif opt == "--runs":
+            runs = int(arg)
+        elif opt == "--json":
+            jsonFile = arg
+        elif opt == "--baseline":
+            baselineFile = arg
+        elif opt == "--tolerance":
+            tolerance = float(arg)
+        elif opt == "--max-ms":
+            maxMs = float(arg)
+    results = MeasureImports(runs)
+    results['cli'] = MeasureCli(runs)
+    for name in IMPORT_NAMES + ('cli',):
+        print '%-30s %8.2f ms' % (name, results[name])
+    if jsonFile:
+        f = open(jsonFile, 'w')
+        json.dump(results, f, indent = 1, sort_keys = True)
+        f.close()
+    failed = False
+    if baselineFile:
+        f = open(baselineFile)
+        baseline = json.load(f)
+        f.close()
+        for name in Compare(results, baseline, tolerance):
+            print 'REGRESSION %s: %.2f ms against %.2f ms' % (name, results[name], baseline[name])
+            failed = True
+    if maxMs is not None and results['cli'] > maxMs:
+        print 'REGRESSION cli: %.2f ms is over the %.2f ms limit' % (results['cli'], maxMs)
+        failed = True
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
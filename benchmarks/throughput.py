@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+"""throughput.py
+
+Generates a SQL corpus and measures how fast it is translated.  The corpus
+has one family of statements for each shape that stresses the translator
+    nested      IN (SELECT ...) subqueries nested like the README example
+    insert      wide INSERT column and value lists
+    conditions  long AND/OR chains in the where clause
+    orderby     wide select and ORDER BY lists
+For each family the time spent in every phase is reported
+    lower       sqlparser.NormalizeSQL, only paid for cache keys
+    tokenise    the sqltokeniser lexer on its own
+    parse       sqlparser.GetASTFromSql (tokenising and the LALR parse)
+    emit        Statement.GetSQL with the --backend from sqlbackend, dal by default
+along with statements per second for parse plus emit.  Results can be
+written as JSON and compared against an earlier run, which is also how two
+backends are compared.
+
+Usage:
+    python benchmarks/throughput.py [--scale=N] [--repeat=N] [--seed=N] [--json=path]
+                                    [--baseline=path] [--tolerance=0.25] [--backend=dal]
+"""
+import os
+import sys
+import json
+import getopt
+import random
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import sqltokeniser
+import sqlparser
+import sqlbackend
+
+PHASES = ('lower', 'tokenise', 'parse', 'emit')
+
+def word(rand, prefix):
+    return prefix + '_' + str(rand.randint(0, 40))
+
+def literal(rand):
+    if rand.random() < 0.3:
+        return str(rand.randint(0, 100000))
+    return "'" + rand.choice(('US', 'GA', 'Y', 'N', 'JR070101', 'Bar Town', '42 Foo St.')) + "'"
+
+def NestedSelect(rand, depth):
+    """select ... where x in (select ... where y in (...)) nested depth times"""
+    sql = ''
+    for level in range(depth, -1, -1):
+        table = 'table_%d' % level
+        inner = sql
+        sql = 'SELECT %s.%s FROM %s WHERE %s.%s IS NOT NULL AND %s.%s = %s' % (
+            table, word(rand, 'col'), table, table, word(rand, 'date'), table, word(rand, 'code'), literal(rand))
+        if inner:
+            sql = sql + ' AND %s.%s IN (%s)' % (table, word(rand, 'col'), inner)
+    return sql
+
+def WideInsert(rand, width):
+    columns = ', '.join(['person.column_%d' % i for i in range(width)])
+    values = ', '.join([literal(rand) for _ in range(width)])
+    return 'INSERT INTO person (%s) VALUES (%s)' % (columns, values)
+
+def LongConditions(rand, length):
+    terms = []
+    for i in range(length):
+        terms.append('emp.%s %s %s' % (word(rand, 'col'), rand.choice(('=', '<>', '<', '>=')), literal(rand)))
+        terms.append(rand.choice(('AND', 'OR')))
+    return 'SELECT emp.emp_id FROM emp WHERE ' + ' '.join(terms[:-1])
+
+def WideOrderBy(rand, width):
+    columns = ['emp.column_%d' % i for i in range(width)]
+    order = ', '.join([column + rand.choice(('', ' ASC', ' DESC')) for column in columns])
+    return 'SELECT %s FROM emp ORDER BY %s' % (', '.join(columns), order)
+
+def GenerateCorpus(scale = 1, seed = 1):
+    """Returns {family : [sql, ...]}, the same for the same scale and seed"""
+    rand = random.Random(seed)
+    return {
+        'nested' : [NestedSelect(rand, rand.randint(1, 4 * scale)) for _ in range(50)],
+        'insert' : [WideInsert(rand, rand.randint(10, 60 * scale)) for _ in range(50)],
+        'conditions' : [LongConditions(rand, rand.randint(10, 60 * scale)) for _ in range(50)],
+        'orderby' : [WideOrderBy(rand, rand.randint(10, 60 * scale)) for _ in range(50)],
+    }
+
+def tokenise(lexer, sql):
+    lexer.input(sql)
+    while lexer.token():
+        pass
+
+def MeasureFamily(statements, repeat, backend):
+    """Returns the seconds spent in each phase translating statements repeat times"""
+    parser = sqlparser.NewParser()
+    lexer = sqltokeniser.NewLexer()
+    times = dict([(phase, 0.0) for phase in PHASES])
+    for _ in range(repeat):
+        for sql in statements:
+            start = time.time()
+            sqlparser.NormalizeSQL(sql)
+            lowerEnd = time.time()
+            tokenise(lexer, sql)
+            tokeniseEnd = time.time()
+            ast = sqlparser.GetASTFromSql(sql, parser, lexer)
+            parseEnd = time.time()
+            ast.GetSQL(backend = backend)
+            emitEnd = time.time()
+            times['lower'] += lowerEnd - start
+            times['tokenise'] += tokeniseEnd - lowerEnd
+            times['parse'] += parseEnd - tokeniseEnd
+            times['emit'] += emitEnd - parseEnd
+    return times
+
+def Measure(corpus, repeat, backend):
+    """Returns {family : {phase ms..., 'statements', 'stmts/sec'}}"""
+    results = {}
+    for family, statements in sorted(corpus.items()):
+        times = MeasureFamily(statements, repeat, backend)
+        count = len(statements) * repeat
+        result = dict([(phase, seconds * 1000) for phase, seconds in times.items()])
+        result['statements'] = count
+        result['stmts/sec'] = count / max(times['parse'] + times['emit'], 1e-9)
+        results[family] = result
+    return results
+
+def Compare(results, baseline, tolerance):
+    """Returns (family, phase) for every phase more than tolerance slower than baseline"""
+    slower = []
+    for family, result in sorted(results.items()):
+        for phase in PHASES:
+            before = baseline.get(family, {}).get(phase)
+            if before and result[phase] > before * (1 + tolerance):
+                slower.append((family, phase))
+    return slower
+
+def usage():
+    print __doc__
+
+def main(argv):
+    try:
+        opts, _ = getopt.getopt(argv, "h", ["help", "scale=", "repeat=", "seed=", "json=", "baseline=", "tolerance=", "backend="])
+    except getopt.GetoptError:
+        usage()
+        sys.exit(2)
+    scale = 1
+    repeat = 5
+    seed = 1
+    jsonFile = None
+    baselineFile = None
+    tolerance = 0.25
+    backendName = 'dal'
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            usage()
+            sys.exit(0)
+        elif opt == "--scale":
+            scale = int(arg)
+        elif opt == "--repeat":
+            repeat = int(arg)
+        elif opt == "--seed":
+            seed = int(arg)
+        elif opt == "--json":
+            jsonFile = arg
+        elif opt == "--baseline":
+            baselineFile = arg
+        elif opt == "--tolerance":
+            tolerance = float(arg)
+        elif opt == "--backend":
+            backendName = arg
+    results = Measure(GenerateCorpus(scale, seed), repeat, sqlbackend.GetBackend(backendName))
+    print '%-12s' % 'family' + ''.join(['%12s' % (phase + ' ms') for phase in PHASES]) + '%12s' % 'stmts/sec'
+    for family, result in sorted(results.items()):
+        print '%-12s' % family + ''.join(['%12.1f' % result[phase] for phase in PHASES]) + '%12.1f' % result['stmts/sec']
+    if jsonFile:
+        f = open(jsonFile, 'w')
+        json.dump({'scale' : scale, 'repeat' : repeat, 'seed' : seed, 'backend' : backendName, 'results' : results}, f, indent = 1, sort_keys = True)
+        f.close()
+    if baselineFile:
+        f = open(baselineFile)
+        baseline = json.load(f)
+        f.close()
+        failed = False
+        for family, phase in Compare(results, baseline['results'], tolerance):
+            print 'REGRESSION %s %s: %.1f ms against %.1f ms' % (family, phase, results[family][phase], baseline['results'][family][phase])
+            failed = True
+        if failed:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,420 @@
+"""sqlbackend.py
+
+Code generators for parsed statements.  The abstract syntax tree only holds
+what the sql said, a backend walks it and writes the code for some target to
+a CodeWriter.  DalBackend writes the c++ DAL code, other targets can be added
+with RegisterBackend without touching the parser or the tree.
+"""
+import json
+import hashlib
+import string
+from sqlabstractsyntaxtree import *
+
+class CodeTemplate:
+    """Code with $name or ${name} slots, as string.Template has them, $$ is
+    a literal $.  The template is compiled once into a % format string so
+    filling it in is a single format operation."""
+    def __init__(self, text):
+        self.Text = text
+        self.Slots = []
+        parts = []
+        end = 0
+        for match in string.Template.pattern.finditer(text):
+            parts.append(text[end:match.start()].replace('%', '%%'))
+            end = match.end()
+            if match.group('escaped') is not None:
+                parts.append('$')
+                continue
+            name = match.group('named') or match.group('braced')
+            if name is None:
+                raise ValueError('Invalid slot at %d in template %r' % (match.start('invalid'), text))
+            self.Slots.append(name)
+            parts.append('%(' + name + ')s')
+        parts.append(text[end:].replace('%', '%%'))
+        self.format = ''.join(parts)
+    def Fill(self, **values):
+        """Returns the code with every slot replaced by the value of that name"""
+        return self.format % values
+
+class Backend:
+    """The base of the code generators.  StatementWriters maps the class name
+    of each kind of statement to the method that writes it, Write looks the
+    statement up there and calls the method with the statement, the
+    CodeWriter and the NamingContext.  A backend that sets Parameterize
+    writes the same code for statements that differ only in their literals,
+    the sql is then parsed and cached as its sqlparser.ParameterizeSQL
+    template."""
+    StatementWriters = {}
+    Parameterize = False
+    def Write(self, statement, writer, context = None):
+        """Writes the code for statement to a CodeWriter"""
+        if context == None:
+            context = NamingContext()
+        getattr(self, self.StatementWriters[statement.__class__.__name__])(statement, writer, context)
+    def GetCode(self, statement, context = None):
+        """Returns the code for statement"""
+        writer = CodeWriter()
+        self.Write(statement, writer, context)
+        return writer.GetCode()
+    def GetSignature(self):
+        """Returns '' or a string that changes whenever the code this backend
+        writes differs from the code for the current GENERATOR_VERSION"""
+        return ''
+
+class DalBackend(Backend):
+    """Writes the c++ DAL code for a statement.  The scaffolding is written
+    from the CodeTemplates in Templates, which are made once.  A shop can
+    give its own text for any of them, by name, when making the backend.
+
+    With parameterize set the literals are not written into the code.  Each
+    becomes a variable param1, param2... numbered in the order the literals
+    appear in the sql, which the code expects the caller to declare as the
+    first line lists them, and the parameter templates are used in place of
+    those that declare and assign literal values."""
+    Templates = {
+        'selectHeader' : 'DALSelect $statement(*(trans->getDALTransaction()));\n',
+        'table' : 'DALTable $tableVar(DALTables::$table);\n',
+        'selectColumn' : 'RWTString st$name;\nDALHostVar hv$name(st$name);\n$statement.addSelect($column, hv$name);\n',
+        'orderBy' : '$statement.addOrderBy($column, $sort);\n',
+        'selectWhere' : '$statement.where(cond);\n',
+        'selectLock' : '$statement.withLock(TRUE);\n',
+        'selectFooter' : ('$statement.execute();\n'
+                          'while($statement.next())\n'
+                          '{\n'
+                          '//Do something with the output host variables here\n'
+                          '// ie use the values of stTableColumn\n'
+                          '}'),
+        'subQuery' : ('DALTable $prefix$tableVar(DALTables::$table);\n'
+                      'DALSubquery $subQuery($statement.newSubquery());\n'
+                      '$subQuery.add_select($prefix$column);\n'),
+        'subQueryWhere' : '$subQuery.where($cond);\n',
+        'updateHeader' : 'DALUpdate $statement(*(trans->getDALTransaction()));\nDALTable $tableVar(DALTables::$table);\n\n',
+        'updateAssign' : ('RWTString $var = "$value";\n'
+                          '$statement.addAssignment(DALAssignment($tableVar[$column],DALHostVar($var)));\n'),
+        'updateWhere' : '$statement.set_criteria(cond);\n',
+        'updateFooter' : '$statement.execute();',
+        'insertHeader' : ('DALInsert $statement(*(trans->getDALTransaction()));\n'
+                          'DALTableList table;\n'
+                          'DALColumnList columns;\n'
+                          'DALVarList values;\n'
+                          'DALTable $tableVar(DALTables::$table);\n\n'),
+        'insertColumn' : ('RWTString $var = TEXT("$value");\n'
+                          'DALInputHostVar $hostVar($var);\n'
+                          'DALColumn $columnVar = $tableVar[$column];\n'
+                          'columns.append(&$columnVar);\n'
+                          'values.append(&$hostVar);\n\n'),
+        'insertFooter' : '$statement.set_columns(columns);\n$statement.set_values(values);\n$statement.execute();\n$statement.reset();\n',
+        'deleteHeader' : ('DALDelete $statement(*(trans->getDALTransaction()));\n'
+                          'DALTable $tableVar(DALTables::$table);\n'
+                          'DALTableList tableList;\n'
+                          'tableList.insert(&$tableVar);\n'
+                          '$statement.set_table(tableList);\n\n'),
+        'deleteFooter' : '$statement.set_criteria(cond);\n$statement.execute();',
+        'conditionHeader' : 'DALCondition $cond(\n',
+        'conditionFooter' : '\n);\n',
+        'stringVariable' : 'RWTString $var = TEXT("$value");\nDALInputHostVar $hostVar($var);\n',
+        'numberVariable' : 'float  $var = $value;\nDALInputHostVar $hostVar($var);\n',
+        'parameters' : '//Parameters: $parameters\n',
+        'parameterVariable' : 'DALInputHostVar $hostVar($var);\n',
+        'parameterUpdateAssign' : '$statement.addAssignment(DALAssignment($tableVar[$column],DALHostVar($var)));\n',
+        'parameterInsertColumn' : ('DALInputHostVar $hostVar($var);\n'
+                                   'DALColumn $columnVar = $tableVar[$column];\n'
+                                   'columns.append(&$columnVar);\n'
+                                   'values.append(&$hostVar);\n\n'),
+    }
+    StatementWriters = {'SelectStatement' : 'writeSelect',
+                        'UpdateStatement' : 'writeUpdate',
+                        'InsertStatement' : 'writeInsert',
+                        'DeleteStatement' : 'writeDelete'}
+    StatementVarNames = {'SelectStatement' : 'select',
+                         'UpdateStatement' : 'update',
+                         'InsertStatement' : 'insert',
+                         'DeleteStatement' : 'del'}
+    # conditions with these operators have their own writer, the rest are
+    # written as left operator right
+    ConditionWriters = {'like' : 'writeLike',
+                        'is' : 'writeIs',
+                        'in' : 'writeIn',
+                        'notin' : 'writeNotIn'}
+    Operators = {'=' : ' == ', '<>' : ' != '}
+    Joins = {'or' : ' ||\n', 'and' : ' &&\n'}
+    def __init__(self, templates = None, parameterize = False):
+        """templates maps template names to text replacing the default in
+        Templates, which may only use the slots the default has"""
+        self.Overrides = templates or {}
+        self.Parameterize = parameterize
+        for name, text in self.Overrides.items():
+            if name not in self.Templates:
+                raise ValueError('Unknown template ' + name)
+            known = CodeTemplate(self.Templates[name]).Slots
+            for slot in CodeTemplate(text).Slots:
+                if slot not in known:
+                    raise ValueError('Unknown slot $' + slot + ' in template ' + name + ', it can use $' + ', $'.join(sorted(set(known))))
+        texts = dict(self.Templates)
+        texts.update(self.Overrides)
+        for name, text in texts.items():
+            setattr(self, name, CodeTemplate(text))
+        if parameterize:
+            self.stringVariable = self.numberVariable = self.parameterVariable
+            self.updateAssign = self.parameterUpdateAssign
+            self.insertColumn = self.parameterInsertColumn
+    def Write(self, statement, writer, context = None):
+        if context == None:
+            context = NamingContext()
+        if self.Parameterize:
+            writer.Write(self.parameters.Fill(parameters = ', '.join(self.numberParameters(statement, context))))
+        Backend.Write(self, statement, writer, context)
+    def GetSignature(self):
+        signature = []
+        if self.Parameterize:
+            signature.append('parameterized')
+        if self.Overrides:
+            signature.append(hashlib.sha1(repr(sorted(self.Overrides.items()))).hexdigest())
+        return ' '.join(signature)
+    def GetStatementVarName(self, statement):
+        return self.StatementVarNames.get(statement.__class__.__name__, 'statement')
+    #
+    # select
+    #
+    def writeSelect(self, statement, writer, context):
+        statementVarName = self.GetStatementVarName(statement)
+        writer.Write(self.selectHeader.Fill(statement = statementVarName))
+        for table in statement.TableList.GetArrayFromList():
+            writer.Write(self.table.Fill(tableVar = ToDalTableVarName(table), table = ToDalTableName(table)))
+        for select in statement.SelectList.GetArrayFromList():
+            writer.Write(self.selectColumn.Fill(statement = statementVarName, name = self.GetTableColumnName(select),
+                                                column = self.GetSelectCode(select)))
+        if statement.WhereCondition != None:
+            self.writeCondition(statement.WhereCondition, writer, statement, context = context)
+        if statement.OrderBy != None:
+            for orderBy in statement.OrderBy.GetArrayFromList():
+                dalSort = 'DAL_SORTDESCENDING'
+                if orderBy.type == 'asc':
+                    dalSort = 'DAL_SORTASCENDING'
+                writer.Write(self.orderBy.Fill(statement = statementVarName, column = self.GetColumnCode(orderBy.GetColumn()), sort = dalSort))
+        writer.Write(self.selectWhere.Fill(statement = statementVarName))
+        if statement.ForUpdate:
+            writer.Write(self.selectLock.Fill(statement = statementVarName))
+        writer.Write(self.selectFooter.Fill(statement = statementVarName))
+    def writeSubQuery(self, statement, writer, statmentVarName, context):
+        selectArr = statement.SelectList.GetArrayFromList()
+        varPrefix = 'sq' + str(context.NextSubQueryId())
+        subQueryVarName = varPrefix + 'SubQuery' + self.GetTableColumnName(selectArr[0]) #Change the way we do this so it is not infinetely recursive
+        context.SetSubQueryName(statement, subQueryVarName)
+        table = statement.TableList.GetArrayFromList()[0]
+        subQueryCondName = 'sqCond' + subQueryVarName
+        writer.Write(self.subQuery.Fill(prefix = varPrefix, tableVar = ToDalTableVarName(table), table = ToDalTableName(table),
+                                        subQuery = subQueryVarName, statement = statmentVarName,
+                                        column = self.GetColumnCode(selectArr[0])))
+        self.writeCondition(statement.WhereCondition, writer, statement, subQueryVarName, varPrefix, subQueryCondName, context)
+        writer.Write(self.subQueryWhere.Fill(subQuery = subQueryVarName, cond = varPrefix + subQueryCondName))
+    #
+    # update
+    #
+    def writeUpdate(self, statement, writer, context):
+        statementVarName = self.GetStatementVarName(statement)
+        tableVarName = ToDalTableVarName(statement.Table)
+        writer.Write(self.updateHeader.Fill(statement = statementVarName, tableVar = tableVarName, table = ToDalTableName(statement.Table)))
+        times = 0
+        for assign in statement.AssignList.GetArrayFromList():
+            times = times + 1 # keep track so we can give the replace variables a unique name
+            writer.Write(self.updateAssign.Fill(statement = statementVarName, tableVar = tableVarName, var = self.GetValueVarName(str(times)),
+                                                value = unQuote(str(assign.GetAssignmentValue())),
+                                                column = self.GetDalName(assign.GetColumn())))
+        if statement.WhereCondition != None:
+            self.writeCondition(statement.WhereCondition, writer, statement, context = context)
+            writer.Write(self.updateWhere.Fill(statement = statementVarName))
+        writer.Write(self.updateFooter.Fill(statement = statementVarName))
+    #
+    # insert
+    #
+    def writeInsert(self, statement, writer, context):
+        statementVarName = self.GetStatementVarName(statement)
+        tableVarName = ToDalTableVarName(statement.Table)
+        columns = statement.ColumnList.GetArrayFromList()
+        values = statement.ValueList.GetArrayFromList()
+        if len(columns) != len(values):
+            raise ValueError('Insert column list is not the same size as the value list')
+        writer.Write(self.insertHeader.Fill(statement = statementVarName, tableVar = tableVarName, table = ToDalTableName(statement.Table)))
+        for i in range(0, len(columns)):
+            times = str(i + 1) # the unique variable maker
+            writer.Write(self.insertColumn.Fill(var = self.GetValueVarName(times), value = unQuote(str(values[i])),
+                                                hostVar = ToDalVarName(columns[i].GetColumn()) + times,
+                                                columnVar = ToDalColumnVarName(columns[i].GetColumn()),
+                                                tableVar = tableVarName, column = self.GetDalName(columns[i])))
+        writer.Write(self.insertFooter.Fill(statement = statementVarName))
+    #
+    # delete
+    #
+    def writeDelete(self, statement, writer, context):
+        statementVarName = self.GetStatementVarName(statement)
+        writer.Write(self.deleteHeader.Fill(statement = statementVarName, tableVar = ToDalTableVarName(statement.Table),
+                                            table = ToDalTableName(statement.Table)))
+        if statement.WhereCondition != None:
+            self.writeCondition(statement.WhereCondition, writer, statement, context = context)
+        writer.Write(self.deleteFooter.Fill(statement = statementVarName))
+    #
+    # parameters
+    #
+    def numberParameters(self, statement, context):
+        """Gives the literals of statement their variable ids in the order
+        they appear in the sql, the order sqlparser.ParameterizeSQL lists
+        their values in, and returns the declarations of the variables"""
+        types = []
+        if isinstance(statement, UpdateStatement):
+            types = ['RWTString'] * len(statement.AssignList.GetArrayFromList())
+        elif isinstance(statement, InsertStatement):
+            types = ['RWTString'] * len(statement.ValueList.GetArrayFromList())
+        context.ReserveInputVarIds(len(types))
+        stack = [getattr(statement, 'WhereCondition', None)]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, ConditionTree):
+                stack.extend(reversed(node.children))
+            elif isinstance(node, Condition):
+                stack.extend((node.Right, node.Left))
+            elif isinstance(node, SelectStatement):
+                stack.append(node.WhereCondition)
+            elif isinstance(node, InputVariable):
+                context.GetInputVarId(node)
+                if isinstance(node.Value, str):
+                    types.append('RWTString')
+                else:
+                    types.append('float')
+        return [types[i] + ' ' + self.GetValueVarName(str(i + 1)) for i in range(len(types))]
+    #
+    # where clause
+    #
+    def writeCondition(self, tree, writer, owningStatement, subQueryVarName = '', varPrefix = '', condVarName = 'cond', context = None):
+        """Visits each condition of a ConditionTree once.  The subquery setup
+        goes straight to the writer while the input variable declarations and
+        the boolean expression are collected in their own buffers and written
+        after it.  The joins are written without adding parentheses, c++
+        gives && the same precedence over || that sql gives and over or."""
+        declarations = []
+        expression = []
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                expression.append(node)
+            elif isinstance(node, ConditionTree):
+                pending = []
+                if node.Grouped:
+                    pending.append(' ( \n')
+                for i in range(len(node.children)):
+                    if i > 0:
+                        pending.append(self.Joins.get(node.type.lower(), ''))
+                    pending.append(node.children[i])
+                if node.Grouped:
+                    pending.append('\n ) ')
+                stack.extend(reversed(pending))
+            else:
+                operator = node.Operator.lower()
+                if operator in ('in', 'notin'):
+                    self.writeSubQuery(node.Right, writer, self.GetStatementVarName(owningStatement), context)
+                for operand in (node.Left, node.Right):
+                    if isinstance(operand, InputVariable):
+                        declarations.append(self.GetInputAssignmentCode(operand, context))
+                conditionWriter = self.ConditionWriters.get(operator)
+                if conditionWriter != None:
+                    expression.append(getattr(self, conditionWriter)(node, varPrefix, context))
+                else:
+                    expression.append(self.writeOperand(node.Left, varPrefix, context) +
+                                      self.Operators.get(operator, ' ' + operator + ' ') +
+                                      self.writeOperand(node.Right, varPrefix, context))
+        writer.Write(*declarations)
+        writer.Write(self.conditionHeader.Fill(cond = varPrefix + condVarName))
+        writer.Write(*expression)
+        writer.Write(self.conditionFooter.Fill())
+    def writeOperand(self, operand, varPrefix, context):
+        if operand == None: return ''
+        if isinstance(operand, QualColumn):
+            return varPrefix + ToDalTableVarName(operand.GetTable()) + '[' + self.GetDalName(operand) + ']'
+        return self.GetHVVarName(operand, context)
+    def writeLike(self, condition, varPrefix, context):
+        return self.writeOperand(condition.Left, varPrefix, context) + '.like(' + condition.Right + ')'
+    def writeIs(self, condition, varPrefix, context):
+        if condition.Right:
+            return self.writeOperand(condition.Left, varPrefix, context) + '.isNull()'
+        return self.writeOperand(condition.Left, varPrefix, context) + '.isNotNull()'
+    def writeIn(self, condition, varPrefix, context):
+        return self.writeOperand(condition.Left, varPrefix, context) + '.in(' + context.GetSubQueryName(condition.Right) + ')'
+    def writeNotIn(self, condition, varPrefix, context):
+        return self.writeOperand(condition.Left, varPrefix, context) + '.notIn(' + context.GetSubQueryName(condition.Right) + ')'
+    #
+    # names
+    #
+    def GetDalName(self, qualColumn):
+        """Returns DbCartonDtl::InvnType for carton_dtl.invn_type"""
+        if GetSchema() != None:
+            names = GetSchema().GetColumnNames(qualColumn.GetTable(), qualColumn.GetColumn())
+            if names != None:
+                return names[0]
+        return 'Db' + ToDalTableName(qualColumn.GetTable()) + '::' + ToDalTableName(qualColumn.GetColumn())
+    def GetTableColumnName(self, select):
+        """Returns CartonDtlInvnType for carton_dtl.invn_type, or for a function of it"""
+        if isinstance(select, FunctionNode):
+            if not select.ensureChild():
+                return "ErrorNoColumnDefined"
+            return self.GetTableColumnName(select.GetArgument())
+        if GetSchema() != None:
+            names = GetSchema().GetColumnNames(select.GetTable(), select.GetColumn())
+            if names != None:
+                return names[1]
+        return ToDalTableName(select.GetTable()) + ToDalTableName(select.GetColumn())
+    def GetColumnCode(self, qualColumn):
+        return ToDalTableVarName(qualColumn.GetTable()) + '[' + self.GetDalName(qualColumn) + ']'
+    def GetSelectCode(self, select):
+        if isinstance(select, FunctionNode):
+            if not select.ensureChild():
+                return "ErrorNoColumnDefined"
+            return 'DAL::' + select.GetFunction() + '(' + self.GetSelectCode(select.GetArgument()) + ')'
+        return self.GetColumnCode(select)
+    def GetValueVarName(self, number):
+        """Returns the variable holding the number'th value an insert or update sets"""
+        if self.Parameterize:
+            return 'param' + number
+        return 'replace' + number
+    def GetVarName(self, inputVariable, context):
+        if self.Parameterize:
+            return 'param' + str(context.GetInputVarId(inputVariable))
+        return 'replace' + str(inputVariable.Value) + str(context.GetInputVarId(inputVariable))
+    def GetHVVarName(self, inputVariable, context):
+        return 'HV' + self.GetVarName(inputVariable, context)
+    def GetInputAssignmentCode(self, inputVariable, context):
+        varName = self.GetVarName(inputVariable, context)
+        if isinstance(inputVariable.Value, str):
+            template = self.stringVariable
+        else:
+            template = self.numberVariable
+        return template.Fill(var = varName, value = str(inputVariable.Value),
+                             hostVar = self.GetHVVarName(inputVariable, context))
+
+def LoadTemplates(path):
+    """Reads template overrides for DalBackend from a JSON file of the form
+    {"template name" : "text", ...}"""
+    f = open(path)
+    try:
+        templates = json.load(f)
+    finally:
+        f.close()
+    return dict([(str(name), str(text)) for name, text in templates.items()])
+
+def unQuote(value):
+    """Returns value without its quotes if it is a quoted string"""
+    if value.find("'") == 0: # if the string is quoted chop it off
+        value = value[1:]
+        value = value[0:len(value) - 1]
+    return value
+
+backends = {}
+
+def RegisterBackend(name, backend):
+    """Makes backend available as GetBackend(name)"""
+    backends[name] = backend
+
+def GetBackend(name = 'dal'):
+    return backends[name]
+
+RegisterBackend('dal', DalBackend())
@@ -0,0 +1,117 @@
+"""sqlcache.py
+
+This keeps generated DAL code on disk so a statement that has already been
+translated is served without lexing, parsing or generating it again.
+"""
+import os
+import hashlib
+import tempfile
+import sqlparser
+from sqlabstractsyntaxtree import GENERATOR_VERSION, GetSchema
+import sqlbackend
+
+class TranslationCache:
+    """A size bounded directory of translations keyed on a hash of the
+    normalized sql and the generator version.  Each entry is one file whose
+    modification time records when it was last used, the least recently used
+    entries are removed once the directory grows past maxBytes.  Several
+    processes may share one directory.  When a schema is set its signature
+    is added to the version, so checked and unchecked translations are kept
+    apart, and so is the signature of a backend writing code from its own
+    templates or with literals parameterized.  A parameterizing backend's
+    translations are keyed on the sqlparser.ParameterizeSQL template, so
+    statements that differ only in their literals share one entry."""
+    def __init__(self, directory, maxBytes = 64 * 1024 * 1024, version = GENERATOR_VERSION):
+        self.Directory = directory
+        self.MaxBytes = maxBytes
+        self.Version = version
+        if GetSchema() != None:
+            self.Version = version + ' schema ' + GetSchema().Signature
+        if sqlbackend.GetBackend().GetSignature():
+            self.Version = self.Version + ' backend ' + sqlbackend.GetBackend().GetSignature()
+        self.Parameterize = sqlbackend.GetBackend().Parameterize
+        self.Hits = 0
+        self.Misses = 0
+        self.Evictions = 0
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.TotalBytes = sum([size for _, size, _ in self.__entries()])
+    def GetKey(self, sql, template = None):
+        """Returns the key of sql's entry.  A caller that has already worked
+        out sql's ParameterizeSQL template can pass it to save doing it again."""
+        if self.Parameterize:
+            if template == None:
+                template = sqlparser.ParameterizeSQL(sql)[0]
+            return hashlib.sha1(self.Version + '\n' + template).hexdigest()
+        return hashlib.sha1(self.Version + '\n' + sqlparser.NormalizeSQL(sql)).hexdigest()
+    def GetPath(self, sql, template = None):
+        return os.path.join(self.Directory, self.GetKey(sql, template) + '.dal')
+    def Get(self, sql, template = None):
+        """Returns the cached code for sql or None"""
+        return self.ReadEntry(self.GetPath(sql, template))
+    def Put(self, sql, code, template = None):
+        """Stores code as the translation of sql"""
+        self.WriteEntry(self.GetPath(sql, template), code)
+    def ReadEntry(self, path):
+        """Returns the code in the entry at path, from GetPath, or None"""
+        try:
+            f = open(path)
+            try:
+                code = f.read()
+            finally:
+                f.close()
+            os.utime(path, None) # mark it as recently used
+        except (IOError, OSError):
+            self.Misses += 1
+            return None
+        self.Hits += 1
+        return code
+    def WriteEntry(self, path, code):
+        """Stores code in the entry at path, from GetPath"""
+        fd, tempPath = tempfile.mkstemp('.tmp', '', self.Directory)
+        try:
+            os.write(fd, code)
+        finally:
+            os.close(fd)
+        os.rename(tempPath, path) # atomic so readers never see half an entry
+        self.TotalBytes += len(code)
+        if self.TotalBytes > self.MaxBytes:
+            self.Evict()
+    def Evict(self):
+        """Removes the least recently used entries until the cache is down
+        to nine tenths of MaxBytes, so eviction does not run on every Put"""
+        entries = self.__entries()
+        entries.sort(key = lambda entry: entry[2])
+        self.TotalBytes = sum([size for _, size, _ in entries])
+        lowWater = self.MaxBytes * 9 / 10
+        for path, size, _ in entries:
+            if self.TotalBytes <= lowWater:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue # another process got there first
+            self.TotalBytes -= size
+            self.Evictions += 1
+    def Translate(self, sql, translate, template = None):
+        """Returns the cached code for sql, calling translate(sql) and storing
+        the result when there is none"""
+        path = self.GetPath(sql, template)
+        code = self.ReadEntry(path)
+        if code == None:
+            code = translate(sql)
+            self.WriteEntry(path, code)
+        return code
+    def __entries(self):
+        """Returns (path, size, last used) for every entry"""
+        entries = []
+        for name in os.listdir(self.Directory):
+            if not name.endswith('.dal'):
+                continue
+            path = os.path.join(self.Directory, name)
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, info.st_size, info.st_mtime))
+        return entries
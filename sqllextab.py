@@ -0,0 +1,9 @@
+# sqllextab.py. This file automatically created by PLY (version 2.5). Don't edit!
+_lextokens    = {'NOTEQUAL': None, 'MIN': None, 'SUM': None, 'COUNT': None, 'EQUAL': None, 'SUBSTR': None, 'NULL': None, 'ORDER': None, 'MINUS': None, 'DOT': None, 'INSERT': None, 'SET': None, 'RPAREN': None, 'DISTINCT': None, 'BY': None, 'ASC': None, 'PLUS': None, 'SELECT': None, 'LTHANEQ': None, 'COMMA': None, 'GTHANEQ': None, 'INTO': None, 'GREATEST': None, 'FUNCTION': None, 'DIVIDE': None, 'FOR': None, 'IS': None, 'UPDATE': None, 'NUMBER': None, 'LTHAN': None, 'SQLBEGIN': None, 'LPAREN': None, 'IN': None, 'WORD': None, 'TIMES': None, 'WHERE': None, 'FROM': None, 'DESC': None, 'AND': None, 'ON': None, 'RIGHT': None, 'JOIN': None, 'LIKE': None, 'CONCAT': None, 'MAX': None, 'SQUOTEDSTR': None, 'GTHAN': None, 'HAVING': None, 'LEFT': None, 'VALUES': None, 'DECODE': None, 'NOT': None, 'AVG': None, 'OR': None, 'DELETE': None}
+_lexreflags   = 0
+_lexliterals  = ''
+_lexstateinfo = {'INITIAL': 'inclusive'}
+_lexstatere   = {'INITIAL': [("(?P<t_WORD>[a-zA-Z_][a-zA-Z_0-9]*)|(?P<t_NUMBER>\\d+)|(?P<t_newline>\\n+)|(?P<t_SQUOTEDSTR>'[^']*')|(?P<t_LTHANEQ><=)|(?P<t_RPAREN>\\))|(?P<t_PLUS>\\+)|(?P<t_DOT>\\.)|(?P<t_NOTEQUAL><>)|(?P<t_GTHANEQ>>=)|(?P<t_LPAREN>\\()|(?P<t_TIMES>\\*)|(?P<t_GTHAN>>)|(?P<t_EQUAL>=)|(?P<t_COMMA>,)|(?P<t_DIVIDE>/)|(?P<t_MINUS>-)|(?P<t_LTHAN><)", [None, ('t_WORD', 'WORD'), ('t_NUMBER', 'NUMBER'), ('t_newline', 'newline'), (None, 'SQUOTEDSTR'), (None, 'LTHANEQ'), (None, 'RPAREN'), (None, 'PLUS'), (None, 'DOT'), (None, 'NOTEQUAL'), (None, 'GTHANEQ'), (None, 'LPAREN'), (None, 'TIMES'), (None, 'GTHAN'), (None, 'EQUAL'), (None, 'COMMA'), (None, 'DIVIDE'), (None, 'MINUS'), (None, 'LTHAN')])]}
+_lexstateignore = {'INITIAL': ' \t'}
+_lexstateerrorf = {'INITIAL': 't_error'}
+_lexsignature = 'cbedac8557e8847a3e75f04c8dea288e'
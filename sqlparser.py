@@ -3,20 +3,38 @@ Author Jonathan Rice
 
 This parses a SQL select, update, delete, or insert statement
 """
+import copy
+import os
+import re
 import sys
+import types
+from hashlib import md5
+import threading
+from collections import OrderedDict
 import ply.yacc as yacc
 
 from sqltokeniser import *
 from sqlabstractsyntaxtree import *
 
+class SqlSyntaxError(Exception):
+    """Raised when a SQL statement can not be parsed"""
+    pass
+
 # Error rule for syntax errors
 def p_error(p):
-    """Prints error messages and exits the program."""
-    print "Syntax error in input! " + str(p)
-    print """You have managed to break the program, if you are using
-a valid SQL statement please send the statement to
-Jonathan Rice, sorry for the trouble."""
-    sys.exit(1)
+    """Raises a SqlSyntaxError so the caller can decide whether to exit or
+    carry on with the next statement."""
+    raise SqlSyntaxError("Syntax error in input! " + str(p))
+
+def appendToList(p, listClass, listType):
+    """The action for a left recursive list rule, 'x : item' starts the list
+    and 'x : x COMMA item' appends to it, so the parse stack stays the same
+    depth however long the list is"""
+    if len(p) == 2:
+        p[0] = listClass(listType, [p[1]])
+    else:
+        p[1].children.append(p[3])
+        p[0] = p[1]
     
 def p_statement(p):
     """statement : insertstatement
@@ -27,38 +45,31 @@ def p_statement(p):
 #Main insert statement
 def p_insert(p):
     'insertstatement : INSERT INTO WORD LPAREN columnlist RPAREN VALUES LPAREN valuelist RPAREN'
+    CheckTable(p[3])
+    if len(p[5].GetArrayFromList()) != len(p[9].GetArrayFromList()):
+        raise SqlSyntaxError('Insert column list is not the same size as the value list')
     p[0] = InsertStatement(p[3], p[5], p[9])
 
 def p_columnlist(p):
-    'columnlist : qualcolumn opcolumn'
-    p[0] = InsertColumnList('columnlist', [p[1], p[2]])
-    
-def p_opcolumn(p):
-    """opcolumn : COMMA columnlist
-                | empty"""
-    if len(p) >= 3:
-        p[0] = p[2] #this will be a columnlist
-    else:
-        p[0] = p[1] # this will be null 
+    """columnlist : qualcolumn
+                  | columnlist COMMA qualcolumn"""
+    appendToList(p, InsertColumnList, 'columnlist')
+
 def p_valuelist(p):
-    """valuelist : NUMBER opvalue
-                 | SQUOTEDSTR opvalue"""
-    p[0] = InsertValueList('columnlist', [p[1], p[2]])
-    
-def p_opvalue(p):
-    """opvalue : COMMA valuelist
-               | empty"""
-    if len(p) >= 3:
-        p[0] = p[2] #this will be a columnlist
-    else:
-        p[0] = p[1] # this will be null
+    """valuelist : NUMBER
+                 | SQUOTEDSTR
+                 | valuelist COMMA NUMBER
+                 | valuelist COMMA SQUOTEDSTR"""
+    appendToList(p, InsertValueList, 'columnlist')
 #Main delete statement
 def p_delete(p):
     'deletestatement : DELETE FROM WORD whereclause'
+    CheckTable(p[3])
     p[0] = DeleteStatement(p[3], p[4])
 # Main update statement
 def p_update(p):
     'updatestatement : UPDATE WORD setclause whereclause'
+    CheckTable(p[2])
     p[0] = UpdateStatement(p[2], p[3], p[4])
     
 def p_setclause(p):
@@ -66,21 +77,14 @@ def p_setclause(p):
     p[0] = p[2]
     
 def p_assign_list(p):
-    'assignlist : assign opassignlist'
-    p[0] = UpdateAssignList('assignlist', [p[1], p[2]])
-
-def p_opassign_list(p):
-    """opassignlist : COMMA assignlist
-                    | empty"""
-    if len(p) >= 3: 
-        p[0] = p[2] #this will be the assignlist
-    else:
-        p[0] = p[1] # this will be null  
+    """assignlist : assign
+                  | assignlist COMMA assign"""
+    appendToList(p, UpdateAssignList, 'assignlist')
     
 def p_assign(p):
     """assign : qualcolumn EQUAL SQUOTEDSTR
               | qualcolumn EQUAL NUMBER"""
-    p[0] = Assign('assign', [p[1], p[3]])
+    p[0] = Assign('assign', (p[1], p[3]))
 # Main select statment
 def p_select(p):
     'selectstatement : SELECT selectlist FROM fromlist whereclause orderby forupdate'
@@ -89,34 +93,23 @@ def p_select(p):
 # fromlist Section
 #
 def p_from_list(p):
-    "fromlist : WORD opfrom"
-    p[0] = FromList('fromlist', [p[1], p[2]])
-    
-def p_opfrom(p):
-    """opfrom : COMMA fromlist
-              | empty"""
-    if len(p) >= 3:
-        p[0] = p[2] #this will be the fromlist
-    else:
-        p[0] = p[1] # this will be null    
+    """fromlist : WORD
+                | fromlist COMMA WORD"""
+    CheckTable(p[len(p) - 1])
+    appendToList(p, FromList, 'fromlist')
 #
 # END fromlist section
 #
 def p_qual_column(p):
     """qualcolumn : WORD DOT WORD"""
-    p[0] = QualColumn('qualcolumn', [p[1], p[3]])
+    CheckColumn(p[1], p[3])
+    p[0] = QualColumn('qualcolumn', (p[1], p[3]))
     
 def p_select_list(p):
-    """selectlist :  singleselect opselect"""
-    p[0] = SelectList('selectlist', [p[1], p[2]])
-
-def p_opselect(p):
-    """opselect : COMMA selectlist
-                | empty"""
-    if len(p) >= 3:
-        p[0] = p[2] #this will be a selectlist
-    else:
-        p[0] = p[1] # this will be null 
+    """selectlist : singleselect
+                  | selectlist COMMA singleselect"""
+    appendToList(p, SelectList, 'selectlist')
+
 def p_single_select(p):
     """singleselect : qualcolumn
                     | function"""
@@ -126,7 +119,7 @@ def p_function(p):
     """function : functionname LPAREN singleselect RPAREN
                 | functionname LPAREN WORD RPAREN
                 | functionname LPAREN NUMBER RPAREN"""
-    p[0] = FunctionNode('function', [p[1], p[3]])
+    p[0] = FunctionNode('function', (p[1], p[3]))
 
 def p_function_name(p):
     """functionname : DISTINCT
@@ -145,27 +138,38 @@ def p_optional_where(p):
              | empty"""
     if len(p) == 2: # the where option was not used
         p[0] = p[1]
-    else:
+    elif isinstance(p[2], ConditionTree) and not p[2].Grouped:
         p[0] = p[2] # return the condition
+    else:
+        p[0] = ConditionTree('and', [p[2]]) # a lone condition, give the where clause a tree to emit
 
-def p_condition_group(p):
-    """conditionlist : LPAREN conditionlist RPAREN"""
-    p[0] = ConditionGroup(p[2])
-            
 def p_condition_list(p):
-    """conditionlist : condition opcondition"""
-    p[1].ChildNode = p[2]
+    """conditionlist : andlist"""
+    p[0] = p[1]
+
+def p_condition_list_or(p):
+    """conditionlist : conditionlist OR andlist"""
+    p[0] = JoinConditions(p[1], 'or', p[3])
+
+def p_and_list(p):
+    """andlist : conditionterm"""
+    p[0] = p[1]
+
+def p_and_list_and(p):
+    """andlist : andlist AND conditionterm"""
+    p[0] = JoinConditions(p[1], 'and', p[3])
+
+def p_condition_term(p):
+    """conditionterm : condition"""
     p[0] = p[1]
 
-def p_opcondition(p):
-    """opcondition : AND conditionlist
-                   | OR conditionlist
-                   | empty"""
-    if len(p) >= 3: # we have a condition set the join type accordingly
-        p[2].JoinType = p[1]
+def p_condition_group(p):
+    """conditionterm : LPAREN conditionlist RPAREN"""
+    if isinstance(p[2], ConditionTree) and not p[2].Grouped:
+        p[2].Grouped = True
         p[0] = p[2]
     else:
-        p[0] = p[1] # we have a null
+        p[0] = ConditionTree('and', [p[2]], True)
     
 def p_condition(p):
     """condition : operand EQUAL operand
@@ -223,38 +227,165 @@ def p_optional_orderby(p):
         p[0] = p[1] # return empty
 
 def p_orderby_list(p):
-    """orderbylist : qualcolumn oporderbylist"""
-    p[0] = OrderByList('asc', [p[1], p[2]])
-def p_orderby_list_asc(p):
-    """orderbylist : qualcolumn ASC oporderbylist"""
-    p[0] = OrderByList('asc', [p[1], p[3]])
-def p_orderby_list_desc(p):
-    """orderbylist : qualcolumn DESC oporderbylist"""
-    p[0] = OrderByList('desc', [p[1], p[3]])
-def p_oporderby_list(p):
-    """oporderbylist : COMMA orderbylist
-                    | empty"""
-    if len(p) >= 3:
-        p[0] = p[2] #this will be a selectlist
-    else:
-        p[0] = p[1] # this will be null 
+    """orderbylist : orderbycolumn
+                   | orderbylist COMMA orderbycolumn"""
+    appendToList(p, OrderByList, 'orderbylist')
+def p_orderby_column(p):
+    """orderbycolumn : qualcolumn
+                     | qualcolumn ASC"""
+    p[0] = OrderByColumn('asc', (p[1],))
+def p_orderby_column_desc(p):
+    """orderbycolumn : qualcolumn DESC"""
+    p[0] = OrderByColumn('desc', (p[1],))
                     
 def p_empty(p):
     "empty :"
     pass
-# Build the lexer
-yacc.yacc()
+def GrammarSignature():
+    """Returns the signature yacc stores in sqlparsetab for this grammar.  It
+    is worked out the way yacc does it, from the precedence and the rule
+    docstrings, without analysing the grammar."""
+    signature = md5(yacc.__tabversion__)
+    signature.update(yacc.default_lr)
+    signature.update(repr(precedence))
+    rules = [rule for name, rule in globals().items()
+             if name.startswith('p_') and name != 'p_error' and isinstance(rule, types.FunctionType)]
+    rules.sort(key = lambda rule: rule.func_code.co_firstlineno)
+    for rule in rules:
+        if rule.__doc__:
+            signature.update(rule.__doc__)
+    return signature.digest()
+
+def WriteTables():
+    """Regenerates sqlparsetab.py and sqllextab.py next to this module.  Run
+    python sqlparser.py after changing the grammar or the tokens."""
+    yacc.yacc(debug = 0, tabmodule = 'sqlparsetab', outputdir = tableDirectory)
+    WriteLexTable()
+
+tableDirectory = os.path.dirname(os.path.abspath(__file__))
+
+# Build the parser.  The LALR tables are loaded from sqlparsetab when it was
+# generated from this grammar, otherwise they are built in memory, which is
+# much slower.  Nothing is written at import time.
+try:
+    import sqlparsetab
+except ImportError:
+    sqlparsetab = None
+if sqlparsetab is not None and sqlparsetab._lr_signature == GrammarSignature():
+    parser = yacc.yacc(debug = 0, optimize = 1, tabmodule = sqlparsetab)
+else:
+    print >>sys.stderr, "sqlparsetab.py is missing or out of date, run python sqlparser.py to rebuild it"
+    parser = yacc.yacc(debug = 0, write_tables = 0)
+
+def NewParser():
+    """Returns a parser that shares the LALR tables with the module level
+    parser but keeps its own parse stacks"""
+    return copy.copy(parser)
 
 def makeSQLLower(sql):
-    """For simplicity of parsing the sql should be made lower case.  However entries in 's should retain there case"""
-    firstPos = sql.find("'")
-    if firstPos < 0: #There are no quoted strings just make the whole thing lower case
-        return sql.lower()
-    before = sql[:firstPos] #this is everythin before the initial quote
-    secondPos = sql.find("'", firstPos + 1)
-    if secondPos < 0: #there was not a second quote this will become an error just lower everythin
-        return sql.lower()
-    return before.lower() + sql[firstPos:secondPos + 1] + makeSQLLower(sql[secondPos + 1:])
-
-def GetASTFromSql(sql):
-    return yacc.parse(makeSQLLower(sql))
+    """For simplicity of parsing the sql should be made lower case.  However entries in 's should retain there case.
+    Splitting on the quotes puts everything outside of a quoted string at an
+    even position, and an escaped '' quote is just an empty piece, so this is
+    a single pass however many literals there are."""
+    pieces = sql.split("'")
+    if len(pieces) % 2 == 0: #the last quote is never closed, this will become an error just lower it as well
+        pieces[-1] = pieces[-1].lower()
+    pieces[0::2] = [piece.lower() for piece in pieces[0::2]]
+    return "'".join(pieces)
+
+def NormalizeSQL(sql):
+    """Returns sql with its keywords lower cased and every run of white space
+    outside of quoted strings collapsed to a single space.  Identifiers and
+    literals keep their case, as the lexer keeps it, so statements that
+    normalize the same parse to the same tree."""
+    return sqlWords.sub(normalizeWord, sql).strip()
+
+def normalizeWord(match):
+    quoted, word = match.groups()
+    if quoted is not None:
+        return quoted
+    if word is not None:
+        keyword = word.lower()
+        if keyword in keywords:
+            return keyword
+        return word
+    return ' '
+
+sqlWords = re.compile(r"('[^']*')|([a-zA-Z_][a-zA-Z_0-9]*)|\s+")
+
+def ParameterizeSQL(sql):
+    """Returns (template, values).  The template is sql normalized as
+    NormalizeSQL does with every quoted string replaced by '' and every
+    number by 0, values holds the literals in the order they appear, strings
+    without their quotes and numbers as ints.  Statements that differ only
+    in their literals have the same template."""
+    values = []
+    def placeholder(match):
+        quoted, word, number = match.groups()
+        if quoted is not None:
+            values.append(quoted[1:-1])
+            return "''"
+        if number is not None:
+            values.append(int(number))
+            return '0'
+        return word
+    return literals.sub(placeholder, NormalizeSQL(sql)), values
+
+literals = re.compile(r"('[^']*')|([a-zA-Z_][a-zA-Z_0-9]*)|(\d+)")
+
+class ASTCache:
+    """A bounded least recently used cache of abstract syntax trees keyed on
+    the normalized sql.  The trees are not changed by GetSQL so one cached
+    tree can be emitted any number of times, from any number of threads."""
+    def __init__(self, maxSize = 1024):
+        self.MaxSize = maxSize
+        self.Hits = 0
+        self.Misses = 0
+        self.Evictions = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+    def Get(self, key):
+        """Returns the tree stored under key or None"""
+        self.lock.acquire()
+        try:
+            ast = self.entries.pop(key, None)
+            if ast is None:
+                self.Misses += 1
+                return None
+            self.entries[key] = ast # move it to the most recently used end
+            self.Hits += 1
+            return ast
+        finally:
+            self.lock.release()
+    def Put(self, key, ast):
+        self.lock.acquire()
+        try:
+            self.entries.pop(key, None)
+            self.entries[key] = ast
+            while len(self.entries) > self.MaxSize:
+                self.entries.popitem(last = False)
+                self.Evictions += 1
+        finally:
+            self.lock.release()
+    def GetStats(self):
+        """Returns the hit, miss and eviction counts and the current size"""
+        return {'hits' : self.Hits, 'misses' : self.Misses,
+                'evictions' : self.Evictions, 'size' : len(self.entries)}
+
+def GetASTFromSql(sql, sqlParser = None, sqlLexer = None, cache = None):
+    """Parses sql into an abstract syntax tree.  The module level parser and
+    lexer are used unless ones from NewParser/NewLexer are given.  When an
+    ASTCache is given it is consulted before parsing."""
+    if sqlParser is None:
+        sqlParser = parser
+    if cache is None:
+        return sqlParser.parse(sql, lexer = sqlLexer)
+    key = NormalizeSQL(sql)
+    ast = cache.Get(key)
+    if ast is None:
+        ast = sqlParser.parse(sql, lexer = sqlLexer)
+        cache.Put(key, ast)
+    return ast
+
+if __name__ == "__main__":
+    WriteTables()
@@ -0,0 +1,99 @@
+
+# /root/package/sqlparsetab.py
+# This file is automatically generated. Do not edit.
+
+_lr_method = 'LALR'
+
+_lr_signature = '\xaa\xec>q.c\xaf\x8f\xec\x15\xb8m.\xf1\x014'
+
+_lr_action_items = {'NOTEQUAL':([43,61,63,65,69,],[-22,-59,79,-60,-61,]),'MIN':([2,29,31,],[12,12,12,]),'SUM':([2,29,31,],[13,13,13,]),'NUMBER':([29,49,59,67,79,80,82,83,84,85,87,89,90,116,130,],[39,65,76,65,65,65,65,65,65,65,65,65,65,124,133,]),'SUBSTR':([2,29,31,],[14,14,14,]),'NULL':([81,100,],[101,117,]),'ORDER':([40,41,43,50,55,61,62,64,65,66,68,69,73,98,99,101,102,103,104,105,107,109,110,111,117,126,131,],[-71,-20,-22,-41,72,-59,-44,-40,-60,-42,-46,-61,-21,-49,-54,-57,-50,-48,-51,-53,-52,-43,-45,-47,-58,-55,-56,]),'CONCAT':([2,29,31,],[23,23,23,]),'INSERT':([0,],[3,]),'SET':([27,],[34,]),'WORD':([2,6,26,28,29,30,31,32,34,44,49,56,60,67,75,79,80,82,83,84,85,87,89,90,95,120,],[22,27,33,36,38,41,22,43,22,22,22,73,22,22,22,22,22,22,22,22,22,22,22,22,22,22,]),'DISTINCT':([2,29,31,],[16,16,16,]),'ASC':([43,114,],[-22,121,]),'BY':([72,],[95,]),'DECODE':([2,29,31,],[17,17,17,]),'COMMA':([11,15,19,21,40,41,42,43,46,47,52,53,54,57,58,73,76,77,78,97,113,114,115,121,122,123,124,125,128,132,133,],[-25,-23,-26,31,56,-20,-24,-22,-15,60,-27,-28,-29,75,-6,-21,-18,-17,-16,-7,120,-68,-66,-69,-70,130,-8,-9,-67,-11,-10,]),'DOT':([22,38,],[32,32,]),'LTHANEQ':([43,61,63,65,69,],[-22,-59,85,-60,-61,]),'GTHANEQ':([43,61,63,65,69,],[-22,-59,87,-60,-61,]),'IS':([43,61,63,65,69,],[-22,-59,81,-60,-61,]),'GREATEST':([2,29,31,],[18,18,18,]),'COUNT':([2,29,31,],[10,10,10,]),'FOR':([40,41,43,50,55,61,62,64,65,66,68,69,70,71,73,98,99,101,102,103,104,105,107,109,110,111,113,114,115,117,121,122,126,128,131,],[-71,-20,-22,-41,-71,-59,-44,-40,-60,-42,-46,-61,93,-65,-21,-49,-54,-57,-50,-48,-51,-53,-52,-43,-45,-47,-64,-68,-66,-58,-69,-70,-55,-67,-56,]),'INTO':([3,],[26,]),'UPDATE':([0,93,],[6,112,]),'SELECT':([0,106,119,],[2,2,2,]),'EQUAL':([43,45,61,63,65,69,],[-22,59,-59,83,-60,-61,]),'LTHAN':([43,61,63,65,69,],[-22,-59,84,-60,-61,]),'LPAREN':([10,12,13,14,16,17,18,20,23,24,25,33,49,67,86,89,90,96,108,],[-31,-33,-32,-36,-30,-38,-37,29,-39,-34,-35,44,67,67,106,67,67,116,119,]),'IN':([43,61,63,65,69,88,],[-22,-59,86,-60,-61,108,]),'RPAREN':([11,19,37,38,39,40,41,43,50,52,53,54,55,57,58,61,62,64,65,66,68,69,70,71,73,91,92,94,97,98,99,101,102,103,104,105,107,109,110,111,112,113,114,115,117,118,121,122,123,124,125,126,127,128,131,132,133,],[-25,-26,52,53,54,-71,-20,-22,-41,-27,-28,-29,-71,74,-6,-59,-44,-40,-60,-42,-46,-61,-71,-65,-21,111,-19,-63,-7,-49,-54,-57,-50,-48,-51,-53,-52,-43,-45,-47,-62,-64,-68,-66,-58,126,-69,-70,129,-8,-9,-55,131,-67,-56,-11,-10,]),'WHERE':([35,36,40,41,46,47,73,76,77,78,],[49,49,49,-20,-15,-14,-21,-18,-17,-16,]),'$end':([1,4,5,7,8,35,36,40,41,43,46,47,48,50,51,55,61,62,64,65,66,68,69,70,71,73,76,77,78,92,94,98,99,101,102,103,104,105,107,109,110,111,112,113,114,115,117,121,122,126,128,129,131,],[-2,-4,0,-3,-1,-71,-71,-71,-20,-22,-15,-14,-13,-41,-12,-71,-59,-44,-40,-60,-42,-46,-61,-71,-65,-21,-18,-17,-16,-19,-63,-49,-54,-57,-50,-48,-51,-53,-52,-43,-45,-47,-62,-64,-68,-66,-58,-69,-70,-55,-67,-5,-56,]),'DESC':([43,114,],[-22,122,]),'AND':([43,61,62,65,66,68,69,98,99,101,102,103,104,105,107,109,110,111,117,126,131,],[-22,-59,-44,-60,90,-46,-61,-49,-54,-57,-50,-48,-51,-53,-52,90,-45,-47,-58,-55,-56,]),'FROM':([9,11,15,19,21,42,43,52,53,54,],[28,-25,-23,-26,30,-24,-22,-27,-28,-29,]),'LIKE':([43,61,63,65,69,],[-22,-59,80,-60,-61,]),'MAX':([2,29,31,],[24,24,24,]),'SQUOTEDSTR':([49,59,67,79,80,82,83,84,85,87,89,90,116,130,],[69,77,69,69,69,69,69,69,69,69,69,69,125,132,]),'GTHAN':([43,61,63,65,69,],[-22,-59,82,-60,-61,]),'VALUES':([74,],[96,]),'NOT':([43,61,63,65,69,81,],[-22,-59,88,-60,-61,100,]),'AVG':([2,29,31,],[25,25,25,]),'OR':([43,61,62,64,65,66,68,69,91,98,99,101,102,103,104,105,107,109,110,111,117,126,131,],[-22,-59,-44,89,-60,-42,-46,-61,89,-49,-54,-57,-50,-48,-51,-53,-52,-43,-45,-47,-58,-55,-56,]),'DELETE':([0,],[9,]),}
+
+_lr_action = { }
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _lr_action.has_key(_x):  _lr_action[_x] = { }
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'fromlist':([30,],[40,]),'orderbylist':([95,],[113,]),'qualcolumn':([2,29,31,34,44,49,60,67,75,79,80,82,83,84,85,87,89,90,95,120,],[11,11,11,45,58,61,45,61,97,61,61,61,61,61,61,61,61,61,114,114,]),'setclause':([27,],[35,]),'deletestatement':([0,],[1,]),'conditionterm':([49,67,89,90,],[62,62,62,110,]),'valuelist':([116,],[123,]),'operand':([49,67,79,80,82,83,84,85,87,89,90,],[63,63,98,99,102,103,104,105,107,63,63,]),'functionname':([2,29,31,],[20,20,20,]),'singleselect':([2,29,31,],[15,37,42,]),'forupdate':([70,],[92,]),'selectstatement':([0,106,119,],[4,118,127,]),'whereclause':([35,36,40,],[48,51,55,]),'conditionlist':([49,67,],[64,91,]),'empty':([35,36,40,55,70,],[50,50,50,71,94,]),'function':([2,29,31,],[19,19,19,]),'statement':([0,],[5,]),'selectlist':([2,],[21,]),'andlist':([49,67,89,],[66,66,109,]),'columnlist':([44,],[57,]),'condition':([49,67,89,90,],[68,68,68,68,]),'orderby':([55,],[70,]),'assignlist':([34,],[47,]),'updatestatement':([0,],[7,]),'insertstatement':([0,],[8,]),'orderbycolumn':([95,120,],[115,128,]),'assign':([34,60,],[46,78,]),}
+
+_lr_goto = { }
+for _k, _v in _lr_goto_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+       if not _lr_goto.has_key(_x): _lr_goto[_x] = { }
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S'",1,None,None,None),
+  ('statement',1,'p_statement','sqlparser.py',40),
+  ('statement',1,'p_statement','sqlparser.py',41),
+  ('statement',1,'p_statement','sqlparser.py',42),
+  ('statement',1,'p_statement','sqlparser.py',43),
+  ('insertstatement',10,'p_insert','sqlparser.py',47),
+  ('columnlist',1,'p_columnlist','sqlparser.py',51),
+  ('columnlist',3,'p_columnlist','sqlparser.py',52),
+  ('valuelist',1,'p_valuelist','sqlparser.py',56),
+  ('valuelist',1,'p_valuelist','sqlparser.py',57),
+  ('valuelist',3,'p_valuelist','sqlparser.py',58),
+  ('valuelist',3,'p_valuelist','sqlparser.py',59),
+  ('deletestatement',4,'p_delete','sqlparser.py',63),
+  ('updatestatement',4,'p_update','sqlparser.py',67),
+  ('setclause',2,'p_setclause','sqlparser.py',71),
+  ('assignlist',1,'p_assign_list','sqlparser.py',75),
+  ('assignlist',3,'p_assign_list','sqlparser.py',76),
+  ('assign',3,'p_assign','sqlparser.py',80),
+  ('assign',3,'p_assign','sqlparser.py',81),
+  ('selectstatement',7,'p_select','sqlparser.py',85),
+  ('fromlist',1,'p_from_list','sqlparser.py',91),
+  ('fromlist',3,'p_from_list','sqlparser.py',92),
+  ('qualcolumn',3,'p_qual_column','sqlparser.py',98),
+  ('selectlist',1,'p_select_list','sqlparser.py',102),
+  ('selectlist',3,'p_select_list','sqlparser.py',103),
+  ('singleselect',1,'p_single_select','sqlparser.py',107),
+  ('singleselect',1,'p_single_select','sqlparser.py',108),
+  ('function',4,'p_function','sqlparser.py',112),
+  ('function',4,'p_function','sqlparser.py',113),
+  ('function',4,'p_function','sqlparser.py',114),
+  ('functionname',1,'p_function_name','sqlparser.py',118),
+  ('functionname',1,'p_function_name','sqlparser.py',119),
+  ('functionname',1,'p_function_name','sqlparser.py',120),
+  ('functionname',1,'p_function_name','sqlparser.py',121),
+  ('functionname',1,'p_function_name','sqlparser.py',122),
+  ('functionname',1,'p_function_name','sqlparser.py',123),
+  ('functionname',1,'p_function_name','sqlparser.py',124),
+  ('functionname',1,'p_function_name','sqlparser.py',125),
+  ('functionname',1,'p_function_name','sqlparser.py',126),
+  ('functionname',1,'p_function_name','sqlparser.py',127),
+  ('whereclause',2,'p_optional_where','sqlparser.py',130),
+  ('whereclause',1,'p_optional_where','sqlparser.py',131),
+  ('conditionlist',1,'p_condition_list','sqlparser.py',140),
+  ('conditionlist',3,'p_condition_list_or','sqlparser.py',144),
+  ('andlist',1,'p_and_list','sqlparser.py',148),
+  ('andlist',3,'p_and_list_and','sqlparser.py',152),
+  ('conditionterm',1,'p_condition_term','sqlparser.py',156),
+  ('conditionterm',3,'p_condition_group','sqlparser.py',160),
+  ('condition',3,'p_condition','sqlparser.py',168),
+  ('condition',3,'p_condition','sqlparser.py',169),
+  ('condition',3,'p_condition','sqlparser.py',170),
+  ('condition',3,'p_condition','sqlparser.py',171),
+  ('condition',3,'p_condition','sqlparser.py',172),
+  ('condition',3,'p_condition','sqlparser.py',173),
+  ('condition',3,'p_condition','sqlparser.py',174),
+  ('condition',5,'p_condition_in','sqlparser.py',179),
+  ('condition',6,'p_condition_not_in','sqlparser.py',182),
+  ('condition',3,'p_condition_is_null','sqlparser.py',186),
+  ('condition',4,'p_condition_is_not_null','sqlparser.py',190),
+  ('operand',1,'p_operand_qual_column','sqlparser.py',194),
+  ('operand',1,'p_operand_number','sqlparser.py',197),
+  ('operand',1,'p_operand_quoted','sqlparser.py',200),
+  ('forupdate',2,'p_optional_for_update','sqlparser.py',207),
+  ('forupdate',1,'p_optional_for_update','sqlparser.py',208),
+  ('orderby',3,'p_optional_orderby','sqlparser.py',215),
+  ('orderby',1,'p_optional_orderby','sqlparser.py',216),
+  ('orderbylist',1,'p_orderby_list','sqlparser.py',223),
+  ('orderbylist',3,'p_orderby_list','sqlparser.py',224),
+  ('orderbycolumn',1,'p_orderby_column','sqlparser.py',227),
+  ('orderbycolumn',2,'p_orderby_column','sqlparser.py',228),
+  ('orderbycolumn',2,'p_orderby_column_desc','sqlparser.py',231),
+  ('empty',0,'p_empty','sqlparser.py',235),
+]
@@ -0,0 +1,103 @@
+"""sqlstats.py
+
+Records where translation time goes, per phase and per statement type, so a
+slow batch can be pinned on normalizing the sql (lower, for the cache keys
+and --parameterize, so nothing when neither is used), the lexer, the LALR
+parse or code emission.
+"""
+import time
+
+PHASES = ('lower', 'tokenise', 'parse', 'emit')
+
+def GetStatementType(ast):
+    """Returns select, update, insert or delete for a parsed statement"""
+    return ast.__class__.__name__.replace('Statement', '').lower()
+
+class TranslationStats:
+    """Totals of wall time and counts for each phase and statement type.
+
+    Timing the lexer separately from the parse needs a clock read on every
+    token, so it is only done when timeTokens is set; otherwise the lexer's
+    time is counted as part of parse.  Stats from several workers can be
+    combined with Merge.  Statements served from a translation cache are
+    only counted, in Cached."""
+    def __init__(self, timeTokens = False):
+        self.TimeTokens = timeTokens
+        self.Types = {}     # statement type -> [count, tokens, seconds for each of PHASES]
+        self.Errors = 0
+        self.Cached = 0
+        self.tokenSeconds = 0.0
+        self.tokenCount = 0
+    def Record(self, statementType, phaseSeconds, tokens = 0):
+        """Adds one translated statement, phaseSeconds holds the seconds
+        spent in each of PHASES in order"""
+        totals = self.Types.get(statementType)
+        if totals == None:
+            totals = [0, 0] + [0.0] * len(PHASES)
+            self.Types[statementType] = totals
+        totals[0] += 1
+        totals[1] += tokens
+        for i in range(len(PHASES)):
+            totals[i + 2] += phaseSeconds[i]
+    def RecordError(self):
+        self.Errors += 1
+    def RecordCached(self):
+        self.Cached += 1
+    def Merge(self, other):
+        """Adds everything recorded in other to these stats"""
+        for statementType, totals in other.Types.items():
+            mine = self.Types.setdefault(statementType, [0, 0] + [0.0] * len(PHASES))
+            for i in range(len(totals)):
+                mine[i] += totals[i]
+        self.Errors += other.Errors
+        self.Cached += other.Cached
+    def GetTokenFunc(self, lexer):
+        """Returns a tokenfunc for yacc's parse that reads tokens from lexer,
+        timing and counting them when TimeTokens is set.  Call
+        TakeTokenTotals after each parse."""
+        if not self.TimeTokens:
+            return lexer.token
+        clock = time.time
+        def token():
+            start = clock()
+            tok = lexer.token()
+            self.tokenSeconds += clock() - start
+            self.tokenCount += 1
+            return tok
+        return token
+    def TakeTokenTotals(self):
+        """Returns (seconds, count) for the tokens read since the last call"""
+        totals = (self.tokenSeconds, self.tokenCount)
+        self.tokenSeconds = 0.0
+        self.tokenCount = 0
+        return totals
+    def GetSummary(self):
+        """Returns {statement type : {'count', 'tokens', phase seconds...}}
+        with an 'all' entry summing every type, and the error and cached counts"""
+        summary = {}
+        everything = [0, 0] + [0.0] * len(PHASES)
+        for statementType, totals in self.Types.items():
+            summary[statementType] = self.__entry(totals)
+            everything = [a + b for a, b in zip(everything, totals)]
+        summary['all'] = self.__entry(everything)
+        summary['all']['errors'] = self.Errors
+        summary['all']['cached'] = self.Cached
+        return summary
+    def FormatSummary(self):
+        """Returns the summary as a printable table of milliseconds"""
+        summary = self.GetSummary()
+        lines = ['%-8s%8s%9s' % ('type', 'count', 'tokens') + ''.join(['%12s' % (phase + ' ms') for phase in PHASES])]
+        for statementType in sorted(summary.keys(), key = lambda name: (name == 'all', name)):
+            entry = summary[statementType]
+            lines.append('%-8s%8d%9d' % (statementType, entry['count'], entry['tokens']) +
+                         ''.join(['%12.2f' % (entry[phase] * 1000) for phase in PHASES]))
+        lines.append('%d statements failed' % self.Errors)
+        lines.append('%d statements were served from the cache' % self.Cached)
+        if not self.TimeTokens:
+            lines.append('tokenise is counted in parse, time tokens to separate them')
+        return '\n'.join(lines)
+    def __entry(self, totals):
+        entry = {'count' : totals[0], 'tokens' : totals[1]}
+        for i in range(len(PHASES)):
+            entry[PHASES[i]] = totals[i + 2]
+        return entry
@@ -6,14 +6,324 @@ This will turn a generic sql into a c++ DAL statement
 """
 import sys
 import getopt
+import multiprocessing
+import threading
+import time
+import sqltokeniser
 import sqlparser
+import sqlcache
+import sqlstats
+import sqlbackend
+from sqlabstractsyntaxtree import CodeWriter, SchemaError, LoadSchema, SetSchema, GetSchema
 
-def sqltodal(sql):
-    """Main point of interest pass this function a sql and it return the
-    correcponding c++ DAL code"""
+BROKEN_MESSAGE = """You have managed to break the program, if you are using
+a valid SQL statement please send the statement to
+Jonathan Rice, sorry for the trouble."""
+
+class SqlToDalTranslator:
+    """Owns a private lexer and parser so translations running on different
+    threads do not share token or parse state.  A single translator is not
+    itself thread safe, give each thread its own (see GetThreadTranslator).
+    When a sqlcache.TranslationCache is given it is consulted first, and a
+    sqlparser.ASTCache, which may be shared between translators, is
+    consulted before parsing.  When a sqlstats.TranslationStats is given the
+    time spent in each phase of every translation is recorded in it.
+
+    Translate returns the code as a string.  GetAST followed by WriteCode
+    writes it to a CodeWriter instead, which can stream it to a file.  When
+    the backend parameterizes literals the sql's ParameterizeSQL template is
+    parsed, so the ASTCache holds one tree for every statement of a shape."""
+    def __init__(self, cache = None, astCache = None, stats = None):
+        self.Parser = sqlparser.NewParser()
+        self.Lexer = sqltokeniser.NewLexer()
+        self.Cache = cache
+        self.ASTCache = astCache
+        self.Stats = stats
+        self.parseTimes = (0.0, 0.0, 0.0, 0) # lower, tokenise and parse seconds and tokens of the last GetAST
+        self.lowerSeconds = 0.0 # spent normalizing the statement being translated before GetAST
+    def GetParameters(self, sql):
+        """GetParameters for sql, with the time it takes counted in the lower
+        phase of the statement's stats"""
+        if self.Stats == None:
+            return GetParameters(sql)
+        start = time.time()
+        parameters = GetParameters(sql)
+        self.lowerSeconds += time.time() - start
+        return parameters
+    def GetAST(self, sql, template = None):
+        """Returns the abstract syntax tree for sql.  When the backend
+        parameterizes literals the tree is that of template, sql's template
+        from GetParameters, which is worked out here when it is not given."""
+        if sqlbackend.GetBackend().Parameterize:
+            if template == None:
+                template = self.GetParameters(sql)[0]
+            sql = template
+        if self.Stats != None:
+            return self.__parseMeasured(sql)
+        return sqlparser.GetASTFromSql(sql, self.Parser, self.Lexer, self.ASTCache)
+    def WriteCode(self, ast, writer):
+        """Writes the c++ DAL code for an ast from GetAST to a CodeWriter"""
+        if self.Stats != None:
+            self.__writeMeasured(ast, writer)
+        else:
+            ast.Write(writer)
+    def Translate(self, sql, template = None):
+        """Returns the c++ DAL code for sql, template is as for GetAST"""
+        if self.Cache == None:
+            return self.__translate(sql, template)
+        start = time.time()
+        path = self.Cache.GetPath(sql, template)
+        self.lowerSeconds += time.time() - start
+        code = self.Cache.ReadEntry(path)
+        if code == None:
+            code = self.__translate(sql, template)
+            self.Cache.WriteEntry(path, code)
+        elif self.Stats != None:
+            self.Stats.RecordCached()
+            self.lowerSeconds = 0.0
+        return code
+    def __translate(self, sql, template):
+        writer = CodeWriter()
+        self.WriteCode(self.GetAST(sql, template), writer)
+        return writer.GetCode()
+    def __parseMeasured(self, sql):
+        """GetAST taken step by step so each phase can be timed, the times
+        are recorded along with the emit time by __writeMeasured.  lower
+        covers normalizing the sql for the ASTCache along with the
+        parameterizing and cache key counted in lowerSeconds."""
+        stats = self.Stats
+        earlier = self.lowerSeconds
+        self.lowerSeconds = 0.0
+        start = time.time()
+        key = None
+        ast = None
+        if self.ASTCache != None:
+            key = sqlparser.NormalizeSQL(sql)
+            ast = self.ASTCache.Get(key)
+        lowered = time.time()
+        if ast == None:
+            try:
+                ast = self.Parser.parse(sql, lexer = self.Lexer, tokenfunc = stats.GetTokenFunc(self.Lexer))
+            except Exception:
+                stats.TakeTokenTotals()
+                stats.RecordError()
+                raise
+            if self.ASTCache != None:
+                self.ASTCache.Put(key, ast)
+        parsed = time.time()
+        tokenSeconds, tokens = stats.TakeTokenTotals()
+        self.parseTimes = (earlier + lowered - start, tokenSeconds, parsed - lowered - tokenSeconds, tokens)
+        return ast
+    def __writeMeasured(self, ast, writer):
+        start = time.time()
+        try:
+            ast.Write(writer)
+        except Exception:
+            self.Stats.RecordError()
+            raise
+        emitted = time.time()
+        lower, tokenise, parse, tokens = self.parseTimes
+        self.Stats.Record(sqlstats.GetStatementType(ast), (lower, tokenise, parse, emitted - start), tokens)
+
+threadTranslators = threading.local()
+
+def GetThreadTranslator():
+    """Returns the SqlToDalTranslator belonging to the calling thread,
+    creating it on first use"""
+    translator = getattr(threadTranslators, 'translator', None)
+    if translator is None:
+        translator = SqlToDalTranslator()
+        threadTranslators.translator = translator
+    return translator
+
+def GetDalFromSql(sql):
+    """Returns the c++ DAL code for a single sql statement"""
     ast = sqlparser.GetASTFromSql(sql) #Now we have an abstract syntax tree
-    code = ast.GetSQL()
-    print code
+    return ast.GetSQL()
+
+def GetParameters(sql):
+    """Returns (template, values) from sqlparser.ParameterizeSQL when the
+    backend parameterizes literals, otherwise (None, None).  Work it out once
+    per statement and hand the template to GetAST, Translate or the cache
+    and the values to GetValuesComment."""
+    if not sqlbackend.GetBackend().Parameterize:
+        return None, None
+    return sqlparser.ParameterizeSQL(sql)
+
+def GetValuesComment(values):
+    """Returns '' or, for the values from GetParameters, a comment listing
+    them in order"""
+    if values == None:
+        return ''
+    comment = []
+    for value in values:
+        if isinstance(value, str):
+            comment.append("'" + value + "'")
+        else:
+            comment.append(str(value))
+    return '//Values: ' + ', '.join(comment) + '\n'
+
+def sqltodal(sql, cache = None):
+    """Main point of interest pass this function a sql and it prints the
+    correcponding c++ DAL code"""
+    template, values = GetParameters(sql)
+    try:
+        if cache != None:
+            code = cache.Translate(sql, GetDalFromSql, template)
+        else:
+            ast = sqlparser.GetASTFromSql(sql)
+    except sqlparser.SqlSyntaxError, e:
+        print e
+        print BROKEN_MESSAGE
+        sys.exit(1)
+    except SchemaError, e:
+        print e
+        sys.exit(1)
+    writer = CodeWriter(sys.stdout)
+    writer.Write(GetValuesComment(values))
+    if cache != None:
+        writer.Write(code)
+    else:
+        ast.Write(writer)
+    writer.Write('\n')
+    writer.Flush()
+
+def ReadStatements(stream, delimiter = None):
+    """Yields the sql statements found in stream one at a time.  Statements
+    are one per line unless a delimiter is given.  Blank statements are skipped."""
+    if delimiter is None:
+        for line in stream:
+            sql = line.strip()
+            if sql:
+                yield sql
+        return
+    pending = ''
+    while True:
+        chunk = stream.read(65536)
+        if not chunk:
+            break
+        pieces = (pending + chunk).split(delimiter)
+        pending = pieces.pop()
+        for piece in pieces:
+            sql = piece.strip()
+            if sql:
+                yield sql
+    sql = pending.strip()
+    if sql:
+        yield sql
+
+workerTranslator = None
+
+def initWorker(cacheDirectory = None, cacheBytes = None, timeTokens = None, schema = None, backend = None):
+    """Gives a pool worker its own translator, and its own handle on the
+    translation cache if one is used.  Stats are kept when timeTokens is
+    True or False."""
+    global workerTranslator
+    if schema != None:
+        SetSchema(schema)
+    if backend != None:
+        sqlbackend.RegisterBackend('dal', backend)
+    cache = None
+    if cacheDirectory != None:
+        cache = sqlcache.TranslationCache(cacheDirectory, cacheBytes)
+    workerTranslator = SqlToDalTranslator(cache)
+    workerTranslator.Stats = newStats(timeTokens)
+
+def newStats(timeTokens):
+    if timeTokens == None:
+        return None
+    return sqlstats.TranslationStats(timeTokens)
+
+def translateStatement(sql):
+    """Returns (sql, code, error, stats) where exactly one of code and error
+    is set and stats, when kept, covers just this statement.  The code starts
+    with the statement's GetValuesComment."""
+    try:
+        template, values = workerTranslator.GetParameters(sql)
+        result = (sql, GetValuesComment(values) + workerTranslator.Translate(sql, template), None)
+    except Exception, e:
+        result = (sql, None, describeError(e))
+    stats = workerTranslator.Stats
+    if stats != None:
+        workerTranslator.Stats = newStats(stats.TimeTokens)
+    return result + (stats,)
+
+def translateAll(statements, jobs = 1, cacheDirectory = None, cacheBytes = None, timeTokens = None):
+    """Yields translateStatement results in input order, sharding the
+    statements across jobs worker processes when jobs is more than one."""
+    if jobs <= 1:
+        initWorker(cacheDirectory, cacheBytes, timeTokens)
+        for sql in statements:
+            yield translateStatement(sql)
+        return
+    pool = multiprocessing.Pool(jobs, initWorker, (cacheDirectory, cacheBytes, timeTokens, GetSchema(), sqlbackend.GetBackend()))
+    try:
+        for result in pool.imap(translateStatement, statements, 64):
+            yield result
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    pool.join()
+
+def writeAll(statements, writer, stats = None):
+    """Translates statements one at a time in this process, writing the code
+    of each to writer once it is complete so no more than one statement's
+    code is held at once, and a statement that fails leaves nothing behind.
+    Returns the number of failed statements."""
+    translator = SqlToDalTranslator(stats = stats)
+    failures = 0
+    for number, sql in enumerate(statements):
+        code = CodeWriter()
+        try:
+            template, values = translator.GetParameters(sql)
+            translator.WriteCode(translator.GetAST(sql, template), code)
+        except Exception, e:
+            failures += 1
+            reportFailure(number, describeError(e), sql)
+            continue
+        writer.Write('//SQL: ' + sql + '\n', GetValuesComment(values), code.GetCode(), '\n\n')
+    return failures
+
+def describeError(error):
+    """Returns the message reported for a statement that failed, naming the
+    kind of error unless it is a syntax or schema error"""
+    if isinstance(error, (sqlparser.SqlSyntaxError, SchemaError)):
+        return str(error)
+    return error.__class__.__name__ + ': ' + str(error)
+
+def reportFailure(number, error, sql):
+    print >>sys.stderr, 'Statement %d: %s\n%s' % (number + 1, error, sql)
+
+def sqltodalbatch(stream, out, delimiter = None, jobs = 1, cacheDirectory = None, cacheBytes = None, stats = None):
+    """Translates every statement read from stream and writes the DAL code to
+    out as it is produced.  Statements that fail to parse or translate are
+    reported on stderr and skipped.  When a sqlstats.TranslationStats is given the
+    phase timings of every statement are added to it.  Returns the number of
+    failed statements."""
+    writer = CodeWriter(out)
+    statements = ReadStatements(stream, delimiter)
+    try:
+        if jobs <= 1 and cacheDirectory is None:
+            return writeAll(statements, writer, stats)
+        failures = 0
+        timeTokens = None
+        if stats != None:
+            timeTokens = stats.TimeTokens
+        results = translateAll(statements, jobs, cacheDirectory, cacheBytes, timeTokens)
+        for number, (sql, code, error, statementStats) in enumerate(results):
+            if statementStats != None:
+                stats.Merge(statementStats)
+            if error is not None:
+                failures += 1
+                reportFailure(number, error, sql)
+                continue
+            writer.Write('//SQL: ' + sql + '\n', code, '\n\n')
+        return failures
+    finally:
+        # whatever was translated before an error reaches out all the same
+        writer.Flush()
+        out.flush()
 
 def usage():
     """Print usage"""
@@ -34,28 +344,113 @@ This program is _NOT_ perfect please read the following warnings!
 Usage:
     -h --help  Displays this screen
     -s --sql="sqlstatement"  The quotes are important
+    -f --file=path  Translate every statement in path, use - for stdin
+    -d --delimiter=";"  Statement separator for --file, the default is
+        one statement per line.  It must not appear inside quoted strings.
+    -j --jobs=N  Translate a --file using N worker processes, the output
+        is still written in input order
+    -c --cache-dir=path  Keep translations in path and reuse them for
+        statements that have not changed
+    --cache-size=MB  Largest size of the --cache-dir, the default is 64
+    --stats  Print the time spent in each phase of a --file run to stderr
+    --time-tokens  As --stats, also timing the lexer apart from the parser
+    --schema=path  A JSON file mapping each table to a list of its columns,
+        statements naming anything else are rejected
+    --templates=path  A JSON file giving the text of any of the templates in
+        sqlbackend.DalBackend.Templates, the code is written from those
+    --parameterize  Write literals as parameters param1, param2... so
+        statements that differ only in their literals get the same code,
+        and share one --cache-dir entry.  The values are listed before it
 Example:
     sqltodal.py --sql="select user_master.login_user_id from user_master order by user_master.login_user_id desc for update"
+    sqltodal.py --file=statements.sql --delimiter=";" > statements.dal
+    sqltodal.py --file=statements.sql --jobs=4 > statements.dal
      """
 
 def main(argv):
     """Main starting point"""
     try:
-        opts, _ = getopt.getopt(argv, "hs:", ["help", "sql="])
+        opts, _ = getopt.getopt(argv, "hs:f:d:j:c:", ["help", "sql=", "file=", "delimiter=", "jobs=",
+                                                       "cache-dir=", "cache-size=", "stats", "time-tokens", "schema=",
+                                                       "templates=", "parameterize"])
     except getopt.GetoptError:
         usage()
         sys.exit(2)
     sql = None
+    fileName = None
+    delimiter = None
+    jobs = 1
+    cacheDirectory = None
+    cacheBytes = 64 * 1024 * 1024
+    stats = None
+    templatesFile = None
+    parameterize = False
     for opt, arg in opts:
         if opt in ("-h", "--help"):
             usage()
             sys.exit(0)
         elif opt in ("-s", "--sql"):
             sql = arg
+        elif opt in ("-f", "--file"):
+            fileName = arg
+        elif opt in ("-d", "--delimiter"):
+            delimiter = arg or None
+        elif opt in ("-j", "--jobs"):
+            try:
+                jobs = int(arg)
+            except ValueError:
+                usage()
+                sys.exit(2)
+        elif opt in ("-c", "--cache-dir"):
+            cacheDirectory = arg
+        elif opt == "--stats":
+            stats = stats or sqlstats.TranslationStats()
+        elif opt == "--time-tokens":
+            stats = sqlstats.TranslationStats(True)
+        elif opt == "--cache-size":
+            try:
+                cacheBytes = int(arg) * 1024 * 1024
+            except ValueError:
+                usage()
+                sys.exit(2)
+        elif opt == "--schema":
+            try:
+                SetSchema(LoadSchema(arg))
+            except (IOError, ValueError), e:
+                print >>sys.stderr, 'Can not load the schema ' + arg + ': ' + str(e)
+                sys.exit(2)
+        elif opt == "--templates":
+            templatesFile = arg
+        elif opt == "--parameterize":
+            parameterize = True
+    if templatesFile != None or parameterize:
+        templates = None
+        try:
+            if templatesFile != None:
+                templates = sqlbackend.LoadTemplates(templatesFile)
+            sqlbackend.RegisterBackend('dal', sqlbackend.DalBackend(templates, parameterize))
+        except (IOError, ValueError), e:
+            print >>sys.stderr, 'Can not load the templates ' + templatesFile + ': ' + str(e)
+            sys.exit(2)
+    if fileName is not None:
+        if fileName == '-':
+            failures = sqltodalbatch(sys.stdin, sys.stdout, delimiter, jobs, cacheDirectory, cacheBytes, stats)
+        else:
+            stream = open(fileName)
+            failures = sqltodalbatch(stream, sys.stdout, delimiter, jobs, cacheDirectory, cacheBytes, stats)
+            stream.close()
+        if stats != None:
+            print >>sys.stderr, stats.FormatSummary()
+        if failures:
+            sys.exit(1)
+        sys.exit(0)
     if sql is None:
         usage()
         sys.exit(0)
-    sqltodal(sql)
+    cache = None
+    if cacheDirectory != None:
+        cache = sqlcache.TranslationCache(cacheDirectory, cacheBytes)
+    sqltodal(sql, cache)
 
 if __name__ == "__main__":
     main(sys.argv[1:])
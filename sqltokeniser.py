@@ -4,6 +4,10 @@ Author Jonathan Rice
 This tokenises a SQL select, update, delete, or insert statement
 """
 
+import os
+import sys
+import types
+from hashlib import md5
 import ply.lex as lex
 
 keywords = {
@@ -49,7 +53,16 @@ precedence = (
 
 def t_WORD(t):
     r'[a-zA-Z_][a-zA-Z_0-9]*'
-    t.type = keywords.get(t.value, 'WORD')
+    # Keywords are matched case insensitively and given their lower case
+    # value, identifiers keep their case as written.  Both are interned so a
+    # name used over and over, in a batch or in cached trees, is one string
+    # and comparing or looking it up starts with an identity check.
+    keyword = t.value.lower()
+    t.type = keywords.get(keyword, 'WORD')
+    if t.type != 'WORD':
+        t.value = keyword
+    if isinstance(t.value, str): # intern only takes str
+        t.value = intern(t.value)
     return t
 
 # A regular expression rule with some action code
@@ -72,7 +85,7 @@ t_ignore  = ' \t'
 
 # Error handling rule TODO change this to abort when it is called
 def t_error(t):
-    print "Illegal character '%s'" % t.value[0]
+    print >>sys.stderr, "Illegal character '%s'" % t.value[0]
     t.lexer.skip(1)
 
 def SetSQL(sql):
@@ -81,8 +94,45 @@ def SetSQL(sql):
 def GetToken():
     return lex.token()
 
-
-lex.lex(nowarn=True)
+def NewLexer():
+    """Returns a private copy of the lexer so a worker does not share token
+    state with the module level lexer"""
+    return lexer.clone()
+
+def LexSignature():
+    """Returns the signature stored in sqllextab for these rules, worked out
+    from the token names and the regular expression of every t_ rule, the
+    string rules and the docstrings of the function rules"""
+    signature = md5(repr(sorted(tokens)))
+    rules = [(name, rule) for name, rule in globals().items() if name.startswith('t_')]
+    for name, rule in sorted([(name, rule) for name, rule in rules if isinstance(rule, str)]):
+        signature.update(name + ' ' + rule + '\n')
+    functions = [rule for name, rule in rules if isinstance(rule, types.FunctionType)]
+    functions.sort(key = lambda rule: rule.func_code.co_firstlineno) # lex tries them in this order
+    for rule in functions:
+        signature.update(rule.__name__ + ' ' + (rule.__doc__ or '') + '\n')
+    return signature.hexdigest()
+
+def WriteLexTable():
+    """Regenerates sqllextab.py next to this module"""
+    lex.lex(nowarn=True).writetab('sqllextab', tableDirectory)
+    f = open(os.path.join(tableDirectory, 'sqllextab.py'), 'a')
+    f.write('_lexsignature = %r\n' % LexSignature())
+    f.close()
+
+tableDirectory = os.path.dirname(os.path.abspath(__file__))
+
+# Load the prebuilt lexer table when it was generated from the rules above,
+# otherwise build the lexer from them.  Nothing is written at import time.
+try:
+    import sqllextab
+except ImportError:
+    sqllextab = None
+if sqllextab is not None and getattr(sqllextab, '_lexsignature', None) == LexSignature():
+    lexer = lex.lex(nowarn=True, optimize=1, lextab=sqllextab)
+else:
+    print >>sys.stderr, "sqllextab.py is missing or out of date, run python sqlparser.py to rebuild it"
+    lexer = lex.lex(nowarn=True)
 #Un comment out to test
 
 # Test it out